@@ -3,7 +3,7 @@ Entity Metadata (HACS) - export/import user overrides.
 
 Default storage:
   - /config/etc/entity_metadata/overrides.yaml
-  - /config/etc/entity_metadata/backups/overrides-YYYYMMDD-HHMMSS.yaml
+  - /config/etc/entity_metadata/backups/overrides-YYYYMMDD-HHMMSS[-N].yaml
 
 Services:
   - entity_metadata.export_overrides
@@ -12,25 +12,43 @@ Services:
 
 from __future__ import annotations
 
+import asyncio
+import heapq
+import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Iterable, Tuple
+from typing import Any, Callable, Dict, Iterable, Tuple
 
 import voluptuous as vol
 import yaml
 
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback
 from homeassistant.config_entries import ConfigEntry
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import area_registry as ar
 from homeassistant.util import dt as dt_util
 
+try:
+    from homeassistant.helpers.normalized_name_base_registry import normalize_name
+except ImportError:  # Home Assistant < 2024.4
+    from homeassistant.helpers.area_registry import (
+        normalize_area_name as normalize_name,
+    )
+
 from .const import (
     DOMAIN,
+    DATA_OPTIONS_DOMAINS,
+    DATA_OPTIONS_SCHEMA,
+    DATA_REGISTRY_VERSION,
     OVERRIDES_FILENAME,
     BACKUPS_DIRNAME,
+    BACKUP_PREFIX,
+    BACKUP_SUFFIX,
     base_dir,
     overrides_path,
     backups_dir,
@@ -38,12 +56,37 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# ----------------------------
+# YAML backend (prefer libyaml C bindings)
+# ----------------------------
+try:
+    from yaml import CSafeDumper as _Dumper, CSafeLoader as _Loader
+
+    _YAML_BACKEND = "libyaml"
+except ImportError:  # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeDumper as _Dumper, SafeLoader as _Loader
+
+    _YAML_BACKEND = "pure-python"
+
+# orjson ships with Home Assistant core; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 # ----------------------------
 # Keys in hass.data
 # ----------------------------
 DATA_SERVICES = "services_registered"
 DATA_ENTRY_IDS = "entry_ids"
 DATA_LISTENERS = "listeners"
+DATA_OVERRIDE_INDEX = "override_index"
+DATA_REGISTRY_UNSUB = "registry_unsub"
+DATA_IO_EXECUTOR = "io_executor"
+DATA_DIRS_READY = "dirs_ready"
+DATA_IMPORT_LOCK = "import_lock"
+DATA_IMPORT_TASKS = "import_tasks"
+DATA_ENTITIES_CACHE = "entities_cache"  # last parse of overrides.yaml
 
 # ----------------------------
 # Service names & schemas
@@ -78,8 +121,15 @@ async def async_setup(hass: HomeAssistant, _config: dict) -> bool:
     _ensure_domain_bucket(hass)
     await _ensure_dirs(hass)
     _register_services_once(hass)
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, lambda evt: None)
-    _LOGGER.info("%s: initialized (storage base: %s)", DOMAIN, base_dir(hass))
+    hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_STOP, callback(lambda evt: _shutdown_io_executor(hass))
+    )
+    _LOGGER.info(
+        "%s: initialized (storage base: %s, yaml backend: %s)",
+        DOMAIN,
+        base_dir(hass),
+        _YAML_BACKEND,
+    )
     return True
 
 
@@ -94,6 +144,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Options change listener (noop today, but ready for future options)
     remove_listener = entry.add_update_listener(_reload_on_options_change)
     hass.data[DOMAIN][DATA_LISTENERS][entry.entry_id] = remove_listener
+
+    # Keep the "entities with overrides" index and the registry version
+    # (used by the options flow's domain list) fresh
+    if hass.data[DOMAIN][DATA_REGISTRY_UNSUB] is None:
+        hass.data[DOMAIN][DATA_REGISTRY_VERSION] = 0
+        hass.data[DOMAIN][DATA_OPTIONS_DOMAINS] = None
+        hass.data[DOMAIN][DATA_OPTIONS_SCHEMA] = None
+        hass.data[DOMAIN][DATA_REGISTRY_UNSUB] = hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED, _registry_listener(hass)
+        )
     _LOGGER.debug("%s: setup_entry id=%s", DOMAIN, entry.entry_id)
 
     # Auto-import on startup if enabled
@@ -113,7 +173,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if remove:
         remove()
 
-    hass.data.get(DOMAIN, {}).get(DATA_ENTRY_IDS, set()).discard(entry.entry_id)
+    bucket = hass.data.get(DOMAIN, {})
+    bucket.get(DATA_ENTRY_IDS, set()).discard(entry.entry_id)
+    if not bucket.get(DATA_ENTRY_IDS) and bucket.get(DATA_REGISTRY_UNSUB):
+        bucket[DATA_REGISTRY_UNSUB]()
+        bucket[DATA_REGISTRY_UNSUB] = None
+        bucket[DATA_OVERRIDE_INDEX] = None
+        bucket[DATA_REGISTRY_VERSION] = None
+        bucket[DATA_OPTIONS_DOMAINS] = None
+        bucket[DATA_OPTIONS_SCHEMA] = None
+    if DOMAIN in hass.data:
+        bucket[DATA_ENTITIES_CACHE] = None
+        _shutdown_io_executor(hass)
     _LOGGER.debug("%s: unload_entry id=%s", DOMAIN, entry.entry_id)
     return True
 
@@ -132,14 +203,58 @@ def _ensure_domain_bucket(hass: HomeAssistant) -> None:
             DATA_SERVICES: False,
             DATA_ENTRY_IDS: set(),
             DATA_LISTENERS: {},
+            DATA_OVERRIDE_INDEX: None,
+            DATA_REGISTRY_UNSUB: None,
+            DATA_REGISTRY_VERSION: None,
+            DATA_OPTIONS_DOMAINS: None,
+            DATA_OPTIONS_SCHEMA: None,
+            DATA_IO_EXECUTOR: None,
+            DATA_DIRS_READY: False,
+            DATA_IMPORT_LOCK: asyncio.Lock(),
+            DATA_IMPORT_TASKS: {},
+            DATA_ENTITIES_CACHE: None,
         }
 
+def _io_executor(hass: HomeAssistant) -> ThreadPoolExecutor:
+    """
+    Return the integration's own I/O pool, creating it on first use.
+
+    Large YAML parses/dumps can hold a worker for a long time; keeping them off
+    HA's shared executor avoids starving other integrations' I/O.
+    """
+    bucket = hass.data[DOMAIN]
+    if bucket[DATA_IO_EXECUTOR] is None:
+        bucket[DATA_IO_EXECUTOR] = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix=f"{DOMAIN}_io"
+        )
+    return bucket[DATA_IO_EXECUTOR]
+
+def _shutdown_io_executor(hass: HomeAssistant) -> None:
+    executor = hass.data[DOMAIN][DATA_IO_EXECUTOR]
+    hass.data[DOMAIN][DATA_IO_EXECUTOR] = None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+def _run_io(hass: HomeAssistant, func: Callable[..., Any], *args: Any) -> asyncio.Future:
+    """Schedule a blocking call on the integration's I/O pool."""
+    return hass.loop.run_in_executor(_io_executor(hass), func, *args)
+
 async def _ensure_dirs(hass: HomeAssistant) -> None:
-    """Create /config/etc/entity_metadata and backups/ if missing."""
+    """
+    Create /config/etc/entity_metadata and backups/ if missing (once).
+
+    Runs before any service can write, so temp files found there are left
+    over from a crash and are removed.
+    """
+    if hass.data[DOMAIN][DATA_DIRS_READY]:
+        return
     def _mk():
         base = base_dir(hass)
         (base / BACKUPS_DIRNAME).mkdir(parents=True, exist_ok=True)
-    await hass.async_add_executor_job(_mk)
+        _remove_stale_temps(base)
+        _remove_stale_temps(base / BACKUPS_DIRNAME)
+    await _run_io(hass, _mk)
+    hass.data[DOMAIN][DATA_DIRS_READY] = True
 
 def _resolve_path(hass: HomeAssistant, maybe_path: str | None, *, default: Path) -> Path:
     """Return an absolute path; relative paths resolved under /config."""
@@ -150,90 +265,390 @@ def _resolve_path(hass: HomeAssistant, maybe_path: str | None, *, default: Path)
         p = Path(hass.config.path(str(p)))
     return p
 
-async def _prune_backups(hass: HomeAssistant, keep: int) -> None:
-    """Keep only the newest N backup files; delete older ones."""
+def _backup_sort_key(body: str) -> Tuple[str, int]:
+    """Split 'YYYYMMDD-HHMMSS[-N]' into (stamp, N) so N orders numerically."""
+    stamp, _, n = body.rpartition("-")
+    if "-" in stamp and n.isdigit():
+        return stamp, int(n)
+    return body, 0
+
+def _prune_backups(directory: Path, keep: int) -> None:
+    """Keep only the newest N backup files; delete older ones (blocking)."""
     if keep <= 0:
         return
 
-    def _do():
-        files = sorted(backups_dir(hass).glob("overrides-*.yaml"), reverse=True)
-        for old in files[keep:]:
-            try:
-                old.unlink()
-            except Exception:
-                pass
+    # Timestamps sort lexicographically, so the newest files have the largest
+    # stamps; a '-N' same-second suffix is compared as a number so -10 > -9
+    prefix, suffix = BACKUP_PREFIX, BACKUP_SUFFIX
+    with os.scandir(directory) as it:
+        files = [
+            (_backup_sort_key(entry.name[len(prefix):-len(suffix)]), entry.path)
+            for entry in it
+            if entry.name.startswith(prefix) and entry.name.endswith(suffix)
+        ]
+    if len(files) <= keep:
+        return
+
+    newest = set(heapq.nlargest(keep, files))
+    for name_path in files:
+        if name_path in newest:
+            continue
+        try:
+            os.unlink(name_path[1])
+        except OSError as exc:
+            _LOGGER.warning(
+                "%s: could not delete old backup %s: %s", DOMAIN, name_path[1], exc
+            )
 
-    await hass.async_add_executor_job(_do)
+def _remove_stale_temps(directory: Path) -> None:
+    """Delete '<name>.<random>.tmp' files left behind by _write_temp (blocking)."""
+    with os.scandir(directory) as it:
+        stale = [
+            entry.path
+            for entry in it
+            if entry.name.startswith("overrides") and entry.name.endswith(".tmp")
+        ]
+    for path in stale:
+        try:
+            os.unlink(path)
+        except OSError as exc:
+            _LOGGER.warning("%s: could not delete temp file %s: %s", DOMAIN, path, exc)
 
 # ----------------------------
 # YAML read/write
 # ----------------------------
 
-async def _read_yaml(hass: HomeAssistant, path: Path) -> Dict[str, Any]:
+def _sidecar_path(path: Path) -> Path:
+    """Return the JSON cache that shadows a YAML file (e.g. overrides.yaml.json)."""
+    return path.with_name(path.name + ".json")
+
+def _create_exclusive(path: Path, raw: bytes, mode: int | None = None) -> None:
+    """
+    Create path, failing if it exists, and write raw to it (blocking).
+
+    Without mode the file gets 0666 minus the umask, like a plain open().
+    """
+    fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        if mode is not None:
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(path)
+        raise
+
+def _write_temp(path: Path, raw: bytes) -> Path:
+    """Write raw to a fresh, uniquely named temp file beside path; return it."""
+    try:
+        mode = os.stat(path).st_mode & 0o777  # keep an existing file's mode
+    except FileNotFoundError:
+        mode = None
+    while True:
+        tmp = path.with_name(f"{path.name}.{os.urandom(6).hex()}.tmp")
+        try:
+            _create_exclusive(tmp, raw, mode)
+            return tmp
+        except FileExistsError:
+            continue
+
+def _write_atomic(path: Path, raw: bytes) -> None:
+    """Write via a temp file + os.replace so path is never missing or partial."""
+    # Replace the file a symlink points at, not the symlink itself
+    path = Path(os.path.realpath(path))
+    tmp = _write_temp(path, raw)
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _write_json_sidecar(
+    path: Path, source: Tuple[int, int], entities: Dict[str, Any]
+) -> None:
+    """Write entities plus the (st_mtime_ns, st_size) of the YAML they came from."""
+    data = {"source": list(source), "entities": entities}
+    if orjson is not None:
+        raw = orjson.dumps(data)
+    else:
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    _write_atomic(path, raw)
+
+def _read_json_sidecar(path: Path) -> Any:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    """Parse a YAML file that must hold a mapping (blocking); empty -> {}."""
+    with path.open("rb") as f:
+        data = yaml.load(f, Loader=_Loader) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"YAML at {path} must be a mapping at top level.")
+    return data
+
+def _load_entities(
+    path: Path, key: Tuple[int, int], *, sidecar: bool
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the {entity_id: props} mapping from an overrides file (blocking).
+
+    key is the file's (st_mtime_ns, st_size), already stat'd by the caller.
+    With sidecar=True (only for the default overrides.yaml) the JSON sidecar
+    is used if it records exactly this key; a file restored with its old
+    mtime (cp -p, SMB copies) therefore never picks up a stale sidecar.
+    Otherwise the YAML is parsed and the sidecar rewritten.
+    """
+    if not sidecar:
+        return _normalize_entities_block(_load_yaml(path))
+
+    cache = _sidecar_path(path)
+    try:
+        data = _read_json_sidecar(cache)
+        if isinstance(data, dict) and data.get("source") == list(key):
+            return _normalize_entities_block(data)
+    except (OSError, ValueError):
+        pass  # missing/corrupt sidecar; fall back to YAML
+
+    entities = _normalize_entities_block(_load_yaml(path))
+    try:
+        _write_json_sidecar(cache, key, entities)
+    except (OSError, TypeError, ValueError) as exc:
+        _LOGGER.debug("%s: could not refresh %s: %s", DOMAIN, cache, exc)
+    return entities
+
+def _read_entities(hass: HomeAssistant, path: Path) -> asyncio.Future:
+    """
+    Read an overrides file on the I/O pool; resolves to (key, entities).
+
+    The read is submitted immediately, so the caller can do loop-side work
+    before awaiting. For the default overrides.yaml, a parse remembered via
+    _remember_entities is reused while the file's (mtime_ns, size) key is
+    unchanged. A missing file resolves to (None, {}). The returned mapping
+    may be shared; do not mutate it.
+    """
+    default = path == overrides_path(hass)
+    cached = hass.data[DOMAIN][DATA_ENTITIES_CACHE] if default else None
+
     def _read():
-        if not path.exists():
-            return {}
-        with path.open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
-            if not isinstance(data, dict):
-                raise ValueError(f"YAML at {path} must be a mapping at top level.")
-            return data
-    return await hass.async_add_executor_job(_read)
-
-async def _write_yaml(hass: HomeAssistant, path: Path, data: Dict[str, Any]) -> None:
-    def _write():
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w", encoding="utf-8") as f:
-            # Keep insertion order so 'version' and 'generated_at' stay at the top
-            yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
-    await hass.async_add_executor_job(_write)
+        # One stat serves both the cache check and the sidecar check
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None, {}
+        key = (st.st_mtime_ns, st.st_size)
+        if cached is not None and cached[0] == key:
+            return cached
+        return key, _load_entities(path, key, sidecar=default)
+
+    return _run_io(hass, _read)
+
+def _remember_entities(
+    hass: HomeAssistant,
+    path: Path,
+    key: Tuple[int, int] | None,
+    entities: Dict[str, Dict[str, Any]],
+) -> None:
+    """Keep the last parse of the default overrides.yaml (one entry only)."""
+    if key is not None and path == overrides_path(hass):
+        hass.data[DOMAIN][DATA_ENTITIES_CACHE] = (key, entities)
+
+def _dump_yaml(data: Dict[str, Any]) -> bytes:
+    """Emit data as UTF-8 YAML bytes (libyaml writes the bytes directly)."""
+    # Keep insertion order so 'version' and 'generated_at' stay at the top
+    return yaml.dump(
+        data,
+        Dumper=_Dumper,
+        encoding="utf-8",
+        default_flow_style=False,
+        sort_keys=False,
+        allow_unicode=True,
+        width=10_000,  # never fold long scalars; skips the emitter's wrap logic
+    )
+
+def _write_unique(path: Path, raw: bytes) -> Path:
+    """
+    Write raw to path, or path-1, path-2, ... if taken; return the one claimed.
+
+    The bytes go to a temp file first and the name is claimed with os.link,
+    which fails if it exists, so a backup name never points at a partial file.
+    Filesystems without hard links (FAT, some network shares) fall back to
+    claiming the name with O_EXCL and writing the bytes into it.
+    """
+    tmp = _write_temp(path, raw)
+    link = True
+    try:
+        candidate, n = path, 0
+        while True:
+            try:
+                if link:
+                    os.link(tmp, candidate)
+                else:
+                    _create_exclusive(candidate, raw)
+                return candidate
+            except FileExistsError:
+                n += 1
+                candidate = path.with_name(f"{path.stem}-{n}{path.suffix}")
+            except OSError:
+                if not link:
+                    raise
+                link = False  # retry the same name without a hard link
+    finally:
+        os.unlink(tmp)
+
+def _export_all(
+    data: Dict[str, Any],
+    out_path: Path | None,
+    backup_path: Path | None,
+    keep: int,
+    *,
+    sidecar: bool,
+) -> Path | None:
+    """
+    Write overrides (+ JSON sidecar if requested) and/or a backup, then prune.
+
+    Runs as a single executor job and emits the YAML once; the backup reuses
+    the same bytes. Two exports within the same second get distinct backup
+    names. Returns the backup path actually written, if any.
+    """
+    raw = _dump_yaml(data)
+    if out_path is not None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(out_path, raw)
+        if sidecar:
+            st = out_path.stat()
+            _write_json_sidecar(
+                _sidecar_path(out_path), (st.st_mtime_ns, st.st_size), data["entities"]
+            )
+    if backup_path is not None:
+        backup_path.parent.mkdir(parents=True, exist_ok=True)
+        backup_path = _write_unique(backup_path, raw)
+        _prune_backups(backup_path.parent, keep)
+    return backup_path
 
 # ----------------------------
 # Registry <-> YAML conversion
 # ----------------------------
 
+def _has_overrides(entry: er.RegistryEntry) -> bool:
+    """True if the entry carries anything _serialize_registry would export."""
+    return bool(
+        entry.name
+        or entry.icon
+        or entry.hidden_by is not None
+        or entry.disabled_by is not None
+    )
+
+def _registry_listener(hass: HomeAssistant):
+    """Return a listener that keeps the override index in sync with the registry."""
+    @callback
+    def _on_registry_updated(event: Event) -> None:
+        bucket = hass.data[DOMAIN]
+        old_entity_id = event.data.get("old_entity_id")
+        if event.data["action"] != "update" or old_entity_id:
+            bucket[DATA_REGISTRY_VERSION] += 1  # set of entity_ids changed
+
+        index = bucket[DATA_OVERRIDE_INDEX]
+        if index is None:
+            return  # not warmed yet; the first export builds it from scratch
+
+        entity_id = event.data["entity_id"]
+        if old_entity_id:
+            index.discard(old_entity_id)
+        if event.data["action"] == "remove":
+            index.discard(entity_id)
+            return
+
+        entry = er.async_get(hass).async_get(entity_id)
+        if entry is not None and _has_overrides(entry):
+            index.add(entity_id)
+        else:
+            index.discard(entity_id)
+
+    return _on_registry_updated
+
+def _override_index(hass: HomeAssistant, ent_reg: er.EntityRegistry) -> set[str] | None:
+    """
+    Return the set of entity_ids with overrides, warming it on first use.
+
+    Returns None when no registry listener is active (YAML-only setup), since
+    the index could not be kept current.
+    """
+    bucket = hass.data[DOMAIN]
+    if bucket[DATA_REGISTRY_UNSUB] is None:
+        return None
+    if bucket[DATA_OVERRIDE_INDEX] is None:
+        bucket[DATA_OVERRIDE_INDEX] = {
+            eid for eid, entry in ent_reg.entities.items() if _has_overrides(entry)
+        }
+    return bucket[DATA_OVERRIDE_INDEX]
+
 def _serialize_registry(
-    ent_reg: er.EntityRegistry, include_domains: Iterable[str] | None, include_all: bool
+    ent_reg: er.EntityRegistry,
+    include_domains: Iterable[str] | None,
+    include_all: bool,
+    override_index: Iterable[str] | None = None,
 ) -> Dict[str, Any]:
     """
     Build a {entity_id: {name/icon/disabled/hidden}} mapping.
 
     Only entities with explicit user overrides (name/icon) or user-disabled/hidden
     are included by default. Set include_all=True to dump every entity.
+    When override_index is given (and include_all is False) only those
+    entity_ids are visited instead of the whole registry. Entities are
+    emitted in alphabetical order either way.
     """
     payload: Dict[str, Any] = {}
-    domains = set(d.lower() for d in (include_domains or []))
+    payload_set = payload.__setitem__
+    domains = frozenset(d.lower() for d in (include_domains or []))
+
+    # Registry keys are canonical (lowercase) entity_ids; no copy is needed
+    # since nothing here yields to the event loop.
+    if include_all or override_index is None:
+        items: Iterable[Tuple[str, er.RegistryEntry | None]] = ent_reg.entities.items()
+    else:
+        get = ent_reg.entities.get
+        items = ((eid, get(eid)) for eid in override_index)
+
+    for eid, entry in items:
+        if entry is None:
+            continue
 
-    for entry in list(ent_reg.entities.values()):
-        # derive domain from entity_id for broad HA compatibility
-        entry_domain = entry.entity_id.partition(".")[0].lower()
-        if domains and entry_domain not in domains:
+        # Override test first: most entities have none, and without
+        # include_all they can be dropped before the domain check
+        name, icon = entry.name, entry.icon
+        hidden = entry.hidden_by is not None
+        disabled = entry.disabled_by is not None
+        overridden = name or icon or hidden or disabled
+        if not (overridden or include_all):
             continue
 
-        data: Dict[str, Any] = {}
+        if domains and eid.partition(".")[0] not in domains:
+            continue
 
-        if entry.name:
-            data["name"] = entry.name
-        if entry.icon:
-            data["icon"] = entry.icon
+        if not overridden:
+            payload_set(eid, {})
+            continue
 
-        if entry.hidden_by is not None:
+        data: Dict[str, Any] = {}
+        if name:
+            data["name"] = name
+        if icon:
+            data["icon"] = icon
+        if hidden:
             data["hidden"] = True
-        if entry.disabled_by is not None:
+        if disabled:
             data["disabled"] = True
+        payload_set(eid, data)
 
-        if include_all or data:
-            payload[entry.entity_id] = data
-
-    # Optional: make entity order stable (alphabetical). Uncomment if desired.
-    # payload = dict(sorted(payload.items()))
+    # Stable alphabetical order so exports diff cleanly, whichever path ran
+    payload = dict(sorted(payload.items()))
 
-    # RFC3339-ish UTC timestamp with trailing 'Z' (avoid '+00:00Z')
-    ts = dt_util.utcnow().isoformat(timespec="seconds")
-    if ts.endswith("+00:00"):
-        ts = ts[:-6] + "Z"
-    elif not ts.endswith("Z"):
-        ts += "Z"
+    # RFC3339 UTC timestamp with trailing 'Z'
+    ts = dt_util.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
 
     # Build in desired top-level order
     return {
@@ -250,86 +665,118 @@ def _normalize_entities_block(blob: Dict[str, Any]) -> Dict[str, Dict[str, Any]]
     """
     if "entities" in blob and isinstance(blob["entities"], dict):
         return blob["entities"]
-    return {k: v for k, v in blob.items() if isinstance(v, dict) and k.count(".") == 1}
+    # Substring test runs before the dict check, so 'version'/'generated_at' exit early
+    return {
+        k: v
+        for k, v in blob.items()
+        if isinstance(k, str) and "." in k and isinstance(v, dict)
+    }
 
 # ----------------------------
 # Apply overrides
 # ----------------------------
 
+def _area_lookup(hass: HomeAssistant) -> Tuple[set[str], Dict[str, str]]:
+    """Snapshot the area registry as (area_ids, {normalized_name: area_id})."""
+    areas = ar.async_get(hass).async_list_areas()
+    by_id: set[str] = set()
+    by_name: Dict[str, str] = {}
+    for area in areas:
+        by_id.add(area.id)
+        by_name[area.normalized_name] = area.id
+    return by_id, by_name
+
+# merge=False clears every field the row does not mention (area is left as-is)
+_RESET_UPDATES: Dict[str, Any] = {
+    "name": None,
+    "icon": None,
+    "hidden_by": None,
+    "disabled_by": None,
+}
+
+# YAML flag -> registry value
+_HIDDEN_BY = {True: er.RegistryEntryHider.USER, False: None}
+_DISABLED_BY = {True: er.RegistryEntryDisabler.USER, False: None}
+
+def _raise_missing(msg: str) -> None:
+    raise ValueError(msg)
+
 async def _apply_overrides(
     hass: HomeAssistant,
     entities_map: Dict[str, Dict[str, Any]],
     *,
     merge: bool,
     strict_entities: bool,
-) -> Tuple[int, int]:
+    areas: Tuple[set[str], Dict[str, str]] | None = None,
+) -> Tuple[int, int, int]:
     """
     Apply overrides to the entity registry.
 
-    Returns (updated_count, skipped_count).
+    Only fields that differ from the registry are written, and rows with no
+    differences are skipped entirely, so re-importing an unchanged file fires
+    no registry updates.
+
+    areas is a precomputed _area_lookup() result (built here if omitted).
+
+    Returns (updated_count, skipped_count, noop_count).
     """
     ent_reg = er.async_get(hass)
-    area_reg = ar.async_get(hass)
+    areas_by_id, areas_by_name = areas if areas is not None else _area_lookup(hass)
 
     updated = 0
     skipped = 0
+    noop = 0
+
+    # Direct dict lookup for canonical entity_ids; async_get only as fallback
+    get_entry = ent_reg.entities.get
+
+    # Resolve merge/strict once instead of re-testing them on every row
+    base_updates: Dict[str, Any] = {} if merge else _RESET_UPDATES
+    on_missing = _raise_missing if strict_entities else _LOGGER.warning
 
     for entity_id, props in entities_map.items():
-        entry = ent_reg.async_get(entity_id)
+        entry = get_entry(entity_id) or ent_reg.async_get(entity_id)
         if entry is None:
             skipped += 1
-            msg = f"{DOMAIN}: import: entity not found: {entity_id}"
-            if strict_entities:
-                raise ValueError(msg)
-            _LOGGER.warning(msg)
+            on_missing(f"{DOMAIN}: import: entity not found: {entity_id}")
             continue
 
-        updates: Dict[str, Any] = {}
+        updates: Dict[str, Any] = base_updates.copy()
 
         if "name" in props:
-            name = props.get("name")
-            updates["name"] = name if name else None
+            updates["name"] = props["name"] or None
 
         if "icon" in props:
-            icon = props.get("icon")
-            updates["icon"] = icon if icon else None
+            updates["icon"] = props["icon"] or None
 
         if "hidden" in props:
-            hidden = bool(props.get("hidden"))
-            updates["hidden_by"] = er.RegistryEntryHider.USER if hidden else None
+            updates["hidden_by"] = _HIDDEN_BY[bool(props["hidden"])]
 
         if "disabled" in props:
-            disabled = bool(props.get("disabled"))
-            updates["disabled_by"] = er.RegistryEntryDisabler.USER if disabled else None
+            updates["disabled_by"] = _DISABLED_BY[bool(props["disabled"])]
 
         if "area" in props:
             area_val = props.get("area")
             area_id = None
             if area_val:
                 # Accept direct area_id, else resolve by name
-                if isinstance(area_val, str) and area_reg.async_get_area(area_val):
-                    area_id = area_val
-                else:
-                    area = area_reg.async_get_area_by_name(str(area_val))
-                    area_id = area.id if area else None
+                area_id = (
+                    area_val if isinstance(area_val, str) and area_val in areas_by_id
+                    else areas_by_name.get(normalize_name(str(area_val)))
+                )
             updates["area_id"] = area_id
 
-        if not merge:
-            if "name" not in props:
-                updates["name"] = None
-            if "icon" not in props:
-                updates["icon"] = None
-            if "hidden" not in props:
-                updates["hidden_by"] = None
-            if "disabled" not in props:
-                updates["disabled_by"] = None
-            if "area" not in props:
-                updates["area_id"] = entry.area_id  # leave as-is explicitly
+        # Update kwargs share names with the RegistryEntry attributes; only
+        # pass fields that actually change
+        updates = {k: v for k, v in updates.items() if getattr(entry, k) != v}
+        if not updates:
+            noop += 1
+            continue
 
         ent_reg.async_update_entity(entity_id, **updates)
         updated += 1
 
-    return updated, skipped
+    return updated, skipped, noop
 
 # ----------------------------
 # Services (export/import)
@@ -337,7 +784,10 @@ async def _apply_overrides(
 
 def _register_services_once(hass: HomeAssistant) -> None:
     """Register services only once per HA instance."""
-    if hass.data[DOMAIN][DATA_SERVICES]:
+    if hass.data[DOMAIN][DATA_SERVICES] or hass.services.has_service(
+        DOMAIN, SERVICE_EXPORT
+    ):
+        hass.data[DOMAIN][DATA_SERVICES] = True
         return
 
     hass.services.async_register(
@@ -359,25 +809,40 @@ async def _handle_export_service(call: ServiceCall) -> None:
     include_domains = params.get("include_domains", [])
 
     ent_reg = er.async_get(hass)
-    blob = _serialize_registry(ent_reg, include_domains, include_all)
+    blob = _serialize_registry(
+        ent_reg,
+        include_domains,
+        include_all,
+        None if include_all else _override_index(hass, ent_reg),
+    )
 
-    # Write main overrides.yaml (optional)
+    out_path: Path | None = None
     if write_overrides:
         out_path = _resolve_path(hass, params.get("path"), default=overrides_path(hass))
-        await _write_yaml(hass, out_path, blob)
-        _LOGGER.info("%s: exported overrides -> %s", DOMAIN, out_path)
 
-    # Write timestamped backup (optional)
+    backup_path: Path | None = None
+    keep = 7
     if write_backup:
         stamp = dt_util.utcnow().strftime("%Y%m%d-%H%M%S")
-        backup_path = backups_dir(hass) / f"overrides-{stamp}.yaml"
-        await _write_yaml(hass, backup_path, blob)
-        _LOGGER.info("%s: wrote backup -> %s", DOMAIN, backup_path)
-
+        backup_path = backups_dir(hass) / f"{BACKUP_PREFIX}{stamp}{BACKUP_SUFFIX}"
         # Honor backup_retention from the (single) config entry
         entries = hass.config_entries.async_entries(DOMAIN)
         keep = int(entries[0].options.get("backup_retention", 7)) if entries else 7
-        await _prune_backups(hass, keep)
+
+    if out_path is None and backup_path is None:
+        return
+
+    # Only the default overrides.yaml gets a JSON sidecar / in-memory parse
+    is_default = out_path == overrides_path(hass)
+    backup_path = await _run_io(
+        hass, partial(_export_all, sidecar=is_default), blob, out_path, backup_path, keep
+    )
+    if is_default:
+        hass.data[DOMAIN][DATA_ENTITIES_CACHE] = None
+    if out_path is not None:
+        _LOGGER.info("%s: exported overrides -> %s", DOMAIN, out_path)
+    if backup_path is not None:
+        _LOGGER.info("%s: wrote backup -> %s", DOMAIN, backup_path)
 
 async def _handle_import_service(call: ServiceCall) -> None:
     hass: HomeAssistant = call.hass
@@ -387,18 +852,60 @@ async def _handle_import_service(call: ServiceCall) -> None:
     merge: bool = params["merge"]
     strict_entities: bool = params["strict_entities"]
 
-    blob = await _read_yaml(hass, in_path)
-    entities_map = _normalize_entities_block(blob)
-
-    updated, skipped = await _apply_overrides(
-        hass, entities_map, merge=merge, strict_entities=strict_entities
-    )
+    # Coalesce racing triggers (e.g. startup auto-import + a manual call):
+    # an identical import that has not started reading the file yet is
+    # joined. Once it has, a single follow-up run is queued behind it so
+    # edits made since then are still picked up.
+    waiting: Dict[Tuple[Path, bool, bool], asyncio.Task] = hass.data[DOMAIN][
+        DATA_IMPORT_TASKS
+    ]
+    key = (in_path, merge, strict_entities)
+    task = waiting.get(key)
+    if task is None:
+        task = hass.async_create_task(
+            _async_import(hass, in_path, merge=merge, strict_entities=strict_entities)
+        )
+        waiting[key] = task
+
+        def _forget(done: asyncio.Task) -> None:
+            # Still registered only if it never took the lock (cancelled)
+            if waiting.get(key) is done:
+                del waiting[key]
+
+        task.add_done_callback(_forget)
+    await asyncio.shield(task)
+
+async def _async_import(
+    hass: HomeAssistant, in_path: Path, *, merge: bool, strict_entities: bool
+) -> None:
+    """Run one import; all imports run one at a time."""
+    bucket = hass.data[DOMAIN]
+    async with bucket[DATA_IMPORT_LOCK]:
+        # Reading starts now; identical calls from here on queue a new run
+        waiting = bucket[DATA_IMPORT_TASKS]
+        key = (in_path, merge, strict_entities)
+        if waiting.get(key) is asyncio.current_task():
+            del waiting[key]
+
+        # Parse on the I/O pool while the area snapshot is built on the loop
+        pending = _read_entities(hass, in_path)
+        areas = _area_lookup(hass)
+        key, entities_map = await pending
+        _remember_entities(hass, in_path, key, entities_map)
+
+        updated, skipped, noop = await _apply_overrides(
+            hass,
+            entities_map,
+            merge=merge,
+            strict_entities=strict_entities,
+            areas=areas,
+        )
 
     _LOGGER.info(
-        "%s: import complete from %s (updated=%d, skipped=%d)",
+        "%s: import complete from %s (updated=%d, unchanged=%d, skipped=%d)",
         DOMAIN,
         in_path,
         updated,
+        noop,
         skipped,
     )
-
@@ -12,7 +12,12 @@ from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import entity_registry as er
 
-from .const import DOMAIN
+from .const import (
+    DATA_OPTIONS_DOMAINS,
+    DATA_OPTIONS_SCHEMA,
+    DATA_REGISTRY_VERSION,
+    DOMAIN,
+)
 
 SERVICE_EXPORT = "export_overrides"  # service name registered in __init__.py
 
@@ -129,33 +134,60 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
             return self.async_create_entry(title="", data=new_options)
 
-        # Build domain choices for multi-select (safe for HA UI serializer)
-        ent_reg = er.async_get(self.hass)
-        domains = sorted({eid.split(".", 1)[0] for eid in ent_reg.entities.keys()})
-        domain_choices = {d: d for d in domains}
+        return self.async_show_form(
+            step_id="init", data_schema=self._options_schema(current)
+        )
 
+    def _options_schema(self, current: dict[str, Any]) -> vol.Schema:
+        """Options form schema, reused until the defaults or domain list change."""
+        defaults = (
+            current.get("auto_import_on_startup", False),
+            current.get("backup_retention", 7),
+            current.get("export_all_entities", False),
+            tuple(current.get("export_domains", [])),
+        )
+        bucket = self.hass.data.get(DOMAIN, {})
+        version = bucket.get(DATA_REGISTRY_VERSION)  # None: no listener running
+        cached = bucket.get(DATA_OPTIONS_SCHEMA)
+        key = (version, defaults)
+        if version is not None and cached is not None and cached[0] == key:
+            return cached[1]
+
+        auto_import, retention, export_all, export_domains = defaults
         schema = vol.Schema(
             {
-                vol.Optional(
-                    "auto_import_on_startup",
-                    default=current.get("auto_import_on_startup", False),
-                ): bool,
-                vol.Optional(
-                    "backup_retention",
-                    default=current.get("backup_retention", 7),
-                ): vol.Coerce(int),
-                vol.Optional(
-                    "export_all_entities",
-                    default=current.get("export_all_entities", False),
-                ): bool,
+                vol.Optional("auto_import_on_startup", default=auto_import): bool,
+                vol.Optional("backup_retention", default=retention): vol.Coerce(int),
+                vol.Optional("export_all_entities", default=export_all): bool,
                 vol.Optional(
                     "export_domains",
-                    default=current.get("export_domains", []),
-                ): cv.multi_select(domain_choices),
+                    default=list(export_domains),
+                ): cv.multi_select(self._domain_choices()),
                 # Non-persistent, one-shot action
                 vol.Optional("export_now", default=False): bool,
             }
         )
+        if version is not None:
+            bucket[DATA_OPTIONS_SCHEMA] = (key, schema)
+        return schema
+
+    def _domain_choices(self) -> dict[str, str]:
+        """
+        Domain choices for the multi-select (safe for HA UI serializer).
+
+        Scanning the registry is O(entities), so the result is cached until the
+        integration's registry listener reports entity_ids being added/removed.
+        """
+        bucket = self.hass.data.get(DOMAIN, {})
+        version = bucket.get(DATA_REGISTRY_VERSION)  # None: no listener running
+        cached = bucket.get(DATA_OPTIONS_DOMAINS)
+        if version is not None and cached is not None and cached[0] == version:
+            return cached[1]
 
-        return self.async_show_form(step_id="init", data_schema=schema)
+        ent_reg = er.async_get(self.hass)
+        domains = sorted({eid.partition(".")[0] for eid in ent_reg.entities})
+        choices = {d: d for d in domains}
+        if version is not None:
+            bucket[DATA_OPTIONS_DOMAINS] = (version, choices)
+        return choices
 
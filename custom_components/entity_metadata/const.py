@@ -8,6 +8,13 @@ DOMAIN = "entity_metadata"
 REL_BASE = Path("etc") / DOMAIN
 OVERRIDES_FILENAME = "overrides.yaml"
 BACKUPS_DIRNAME = "backups"
+BACKUP_PREFIX = "overrides-"  # backups/overrides-YYYYMMDD-HHMMSS[-N].yaml
+BACKUP_SUFFIX = ".yaml"
+
+# hass.data[DOMAIN] keys shared with the config flow
+DATA_REGISTRY_VERSION = "registry_version"  # bumped when entity_ids come/go
+DATA_OPTIONS_DOMAINS = "options_domains"    # (registry_version, domain choices)
+DATA_OPTIONS_SCHEMA = "options_schema"      # ((registry_version, defaults), schema)
 
 def base_dir(hass: HomeAssistant) -> Path:
     return Path(hass.config.path(REL_BASE))
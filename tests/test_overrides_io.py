@@ -0,0 +1,303 @@
+"""Tests for overrides file parsing, caching and backup handling."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+pytest.importorskip("homeassistant")
+
+import custom_components.entity_metadata as em  # noqa: E402
+from custom_components.entity_metadata import (  # noqa: E402
+    DATA_ENTITIES_CACHE,
+    DOMAIN,
+    _export_all,
+    _load_entities,
+    _load_yaml,
+    _normalize_entities_block,
+    _prune_backups,
+    _read_entities,
+    _remember_entities,
+    _serialize_registry,
+)
+
+
+def _entities(tmp_path, text: str):
+    path = tmp_path / "overrides.yaml"
+    path.write_text(text, encoding="utf-8")
+    return _normalize_entities_block(_load_yaml(path))
+
+
+def test_entities_block_wins_over_top_level_entity_keys(tmp_path):
+    text = "entities:\n  light.a: {name: A}\nlight.b: {name: B}\n"
+    assert _entities(tmp_path, text) == {"light.a": {"name": "A"}}
+
+
+def test_top_level_entity_keys_without_entities_block(tmp_path):
+    text = "version: 1\nlight.a: {name: A}\nnot_an_entity: {name: X}\n"
+    assert _entities(tmp_path, text) == {"light.a": {"name": "A"}}
+
+
+def test_merge_keys_and_aliases(tmp_path):
+    text = (
+        "base: &b {icon: mdi:lamp, name: Base}\n"
+        "entities:\n"
+        "  light.a:\n    <<: *b\n    name: Own\n"
+        "  light.b: *b\n"
+    )
+    assert _entities(tmp_path, text) == {
+        "light.a": {"icon": "mdi:lamp", "name": "Own"},
+        "light.b": {"icon": "mdi:lamp", "name": "Base"},
+    }
+
+
+@pytest.mark.parametrize("text", ["", "# only a comment\n", "~\n"])
+def test_empty_documents(tmp_path, text):
+    assert _entities(tmp_path, text) == {}
+
+
+def test_non_mapping_document_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _entities(tmp_path, "- light.a\n")
+
+
+def test_bare_merge_key_value_is_rejected(tmp_path):
+    with pytest.raises(yaml.YAMLError):
+        _entities(tmp_path, "entities:\n  light.a: {name: <<}\n")
+
+
+def test_multi_document_file_is_rejected(tmp_path):
+    with pytest.raises(yaml.YAMLError):
+        _entities(tmp_path, "entities: {}\n---\nentities: {}\n")
+
+
+def _blob(entities):
+    return {"version": 1, "generated_at": "2025-01-01T00:00:00Z", "entities": entities}
+
+
+def _load(path, *, sidecar):
+    st = path.stat()
+    return _load_entities(path, (st.st_mtime_ns, st.st_size), sidecar=sidecar)
+
+
+def test_fresh_sidecar_skips_yaml_parse(tmp_path, monkeypatch):
+    out = tmp_path / "overrides.yaml"
+    _export_all(_blob({"light.a": {"name": "A"}}), out, None, 7, sidecar=True)
+
+    def _fail(_path):
+        raise AssertionError("YAML should not be parsed")
+
+    monkeypatch.setattr(em, "_load_yaml", _fail)
+    assert _load(out, sidecar=True) == {"light.a": {"name": "A"}}
+
+
+def test_sidecar_ignored_after_restore_with_older_mtime(tmp_path):
+    out = tmp_path / "overrides.yaml"
+    restored = tmp_path / "restored.yaml"
+    restored.write_text("entities:\n  light.a: {name: RESTORED}\n", encoding="utf-8")
+    os.utime(restored, ns=(1_000_000_000, 1_000_000_000))
+
+    _export_all(_blob({"light.a": {"name": "NEW"}}), out, None, 7, sidecar=True)
+    shutil.copy2(restored, out)  # keeps the old mtime, like cp -p
+
+    assert _load(out, sidecar=True) == {"light.a": {"name": "RESTORED"}}
+    # ...and the refreshed sidecar now matches the restored file
+    assert _load(out, sidecar=True) == {"light.a": {"name": "RESTORED"}}
+
+
+def test_no_sidecar_for_other_paths(tmp_path):
+    backup = tmp_path / "overrides-20250101-000000.yaml"
+    _export_all(_blob({"light.a": {"name": "A"}}), backup, None, 7, sidecar=False)
+    assert _load(backup, sidecar=False) == {"light.a": {"name": "A"}}
+    assert sorted(p.name for p in tmp_path.iterdir()) == [backup.name]
+
+
+def _fake_hass(config_dir):
+    hass = SimpleNamespace(
+        data={},
+        config=SimpleNamespace(path=lambda *parts: str(config_dir.joinpath(*parts))),
+    )
+    em._ensure_domain_bucket(hass)
+    return hass
+
+
+def _import_read(hass, path):
+    async def _run():
+        hass.loop = asyncio.get_running_loop()
+        key, entities = await _read_entities(hass, path)
+        _remember_entities(hass, path, key, entities)
+        em._shutdown_io_executor(hass)
+        return entities
+
+    return asyncio.run(_run())
+
+
+def test_missing_file_reads_as_empty(tmp_path):
+    hass = _fake_hass(tmp_path)
+    assert _import_read(hass, em.overrides_path(hass)) == {}
+    assert hass.data[DOMAIN][DATA_ENTITIES_CACHE] is None
+
+
+def test_parse_cache_holds_only_the_default_file(tmp_path, monkeypatch):
+    hass = _fake_hass(tmp_path)
+    default = em.overrides_path(hass)
+    default.parent.mkdir(parents=True)
+    default.write_text("entities:\n  light.a: {name: A}\n", encoding="utf-8")
+    other = tmp_path / "other.yaml"
+    other.write_text("entities:\n  light.b: {name: B}\n", encoding="utf-8")
+
+    calls = []
+    real_load = em._load_entities
+
+    def _counting_load(path, key, *, sidecar):
+        calls.append(path)
+        return real_load(path, key, sidecar=sidecar)
+
+    monkeypatch.setattr(em, "_load_entities", _counting_load)
+
+    assert _import_read(hass, default) == {"light.a": {"name": "A"}}
+    assert _import_read(hass, default) == {"light.a": {"name": "A"}}
+    assert calls == [default]
+
+    assert _import_read(hass, other) == {"light.b": {"name": "B"}}
+    assert hass.data[DOMAIN][DATA_ENTITIES_CACHE][1] == {"light.a": {"name": "A"}}
+
+    default.write_text("entities:\n  light.a: {name: AA}\n", encoding="utf-8")
+    assert _import_read(hass, default) == {"light.a": {"name": "AA"}}
+
+
+def test_concurrent_exports_leave_no_temp_files(tmp_path):
+    out = tmp_path / "overrides.yaml"
+    blobs = [_blob({f"light.l{i}": {"name": f"L{i}"}}) for i in range(20)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for fut in [pool.submit(_export_all, b, out, None, 7, sidecar=True) for b in blobs]:
+            fut.result()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "overrides.yaml",
+        "overrides.yaml.json",
+    ]
+    assert len(_load_yaml(out)["entities"]) == 1
+
+
+def test_prune_orders_same_second_suffixes_numerically(tmp_path):
+    names = ["overrides-20240101-120000.yaml"] + [
+        f"overrides-20240101-120000-{n}.yaml" for n in range(1, 12)
+    ]
+    for name in names:
+        (tmp_path / name).write_text("entities: {}\n", encoding="utf-8")
+    (tmp_path / "overrides-20231231-235959-99.yaml").write_text("", encoding="utf-8")
+
+    _prune_backups(tmp_path, 3)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "overrides-20240101-120000-10.yaml",
+        "overrides-20240101-120000-11.yaml",
+        "overrides-20240101-120000-9.yaml",
+    ]
+
+
+def test_same_second_backups_get_distinct_complete_files(tmp_path):
+    backups = tmp_path / "backups"
+    stamp = backups / "overrides-20240101-120000.yaml"
+    blob = _blob({"light.a": {"name": "A"}})
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        written = [
+            fut.result()
+            for fut in [pool.submit(_export_all, blob, None, stamp, 50, sidecar=False)
+                        for _ in range(12)]
+        ]
+
+    assert len(set(written)) == 12
+    assert sorted(p.name for p in backups.iterdir()) == sorted(p.name for p in written)
+    for path in written:
+        assert _load_yaml(path) == blob
+
+
+def test_link_fallback_when_hard_links_are_unsupported(tmp_path, monkeypatch):
+    def _no_link(*_args):
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(em.os, "link", _no_link)
+    stamp = tmp_path / "overrides-20240101-120000.yaml"
+    blob = _blob({"light.a": {"name": "A"}})
+    written = [_export_all(blob, None, stamp, 50, sidecar=False) for _ in range(2)]
+
+    assert [p.name for p in written] == [
+        "overrides-20240101-120000.yaml",
+        "overrides-20240101-120000-1.yaml",
+    ]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(p.name for p in written)
+    assert all(_load_yaml(p) == blob for p in written)
+
+
+def test_export_replaces_symlink_target(tmp_path):
+    real = tmp_path / "real.yaml"
+    real.write_text("entities: {}\n", encoding="utf-8")
+    out = tmp_path / "overrides.yaml"
+    out.symlink_to(real)
+
+    _export_all(_blob({"light.a": {"name": "A"}}), out, None, 7, sidecar=False)
+
+    assert out.is_symlink()
+    assert _load_yaml(real)["entities"] == {"light.a": {"name": "A"}}
+
+
+def test_new_files_respect_umask(tmp_path):
+    old = os.umask(0o027)
+    try:
+        _export_all(_blob({}), tmp_path / "overrides.yaml", None, 7, sidecar=True)
+    finally:
+        os.umask(old)
+    for path in tmp_path.iterdir():
+        assert path.stat().st_mode & 0o777 == 0o640
+
+
+def test_setup_removes_crashed_temp_files(tmp_path):
+    hass = _fake_hass(tmp_path)
+    base = em.base_dir(hass)
+    (base / "backups").mkdir(parents=True)
+    (base / "overrides.yaml.1a2b3c.tmp").write_bytes(b"partial")
+    (base / "backups" / "overrides-20240101-120000.yaml.4d5e6f.tmp").write_bytes(b"")
+    (base / "notes.tmp").write_bytes(b"keep")
+
+    async def _run():
+        hass.loop = asyncio.get_running_loop()
+        await em._ensure_dirs(hass)
+        em._shutdown_io_executor(hass)
+
+    asyncio.run(_run())
+
+    assert sorted(p.name for p in base.iterdir()) == ["backups", "notes.tmp"]
+    assert list((base / "backups").iterdir()) == []
+
+
+def _reg_entry(name=None):
+    return SimpleNamespace(name=name, icon=None, hidden_by=None, disabled_by=None)
+
+
+def test_every_export_path_sorts_alphabetically():
+    ent_reg = SimpleNamespace(
+        entities={
+            "switch.z": _reg_entry("Z"),
+            "light.b": _reg_entry(),
+            "light.a": _reg_entry("A"),
+            "sensor.m": _reg_entry("M"),
+        }
+    )
+    full = _serialize_registry(ent_reg, None, False)["entities"]
+    indexed = _serialize_registry(
+        ent_reg, None, False, override_index={"sensor.m", "light.a", "switch.z", "gone.x"}
+    )["entities"]
+    everything = _serialize_registry(ent_reg, None, True)["entities"]
+
+    assert list(full) == ["light.a", "sensor.m", "switch.z"]
+    assert list(indexed) == list(full)
+    assert indexed == full
+    assert list(everything) == ["light.a", "light.b", "sensor.m", "switch.z"]
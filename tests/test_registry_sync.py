@@ -0,0 +1,244 @@
+"""Tests for applying overrides to the registry and keeping the index in sync."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+import custom_components.entity_metadata as em  # noqa: E402
+from custom_components.entity_metadata import (  # noqa: E402
+    DATA_IMPORT_TASKS,
+    DATA_OVERRIDE_INDEX,
+    DATA_REGISTRY_UNSUB,
+    DATA_REGISTRY_VERSION,
+    DOMAIN,
+    _RESET_UPDATES,
+    _apply_overrides,
+    _area_lookup,
+    _override_index,
+    _registry_listener,
+)
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+
+
+def _reg_entry(entity_id, **fields):
+    values = {
+        "name": None,
+        "icon": None,
+        "hidden_by": None,
+        "disabled_by": None,
+        "area_id": None,
+    }
+    values.update(fields)
+    return SimpleNamespace(entity_id=entity_id, **values)
+
+
+class _FakeRegistry:
+    """Just enough of EntityRegistry for _apply_overrides and the listener."""
+
+    def __init__(self, *entries):
+        self.entities = {entry.entity_id: entry for entry in entries}
+        self.updates = []
+
+    def async_get(self, entity_id):
+        return self.entities.get(entity_id)
+
+    def async_update_entity(self, entity_id, **changes):
+        self.updates.append((entity_id, changes))
+        for key, value in changes.items():
+            setattr(self.entities[entity_id], key, value)
+
+
+class _FakeAreas:
+    def __init__(self, *names):
+        self.areas = [
+            SimpleNamespace(
+                id=name.lower().replace(" ", "_"),
+                name=name,
+                normalized_name=em.normalize_name(name),
+            )
+            for name in names
+        ]
+
+    def async_list_areas(self):
+        return self.areas
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    reg = _FakeRegistry(
+        _reg_entry("light.kitchen", name="Kitchen", icon="mdi:lamp"),
+        _reg_entry("switch.fan"),
+    )
+    monkeypatch.setattr(em.er, "async_get", lambda _hass: reg)
+    monkeypatch.setattr(em.ar, "async_get", lambda _hass: _FakeAreas("Living Room"))
+    return reg
+
+
+def _apply(entities_map, *, merge=True, strict_entities=False):
+    return asyncio.run(
+        _apply_overrides(
+            None, entities_map, merge=merge, strict_entities=strict_entities
+        )
+    )
+
+
+def test_unchanged_rows_are_skipped(registry):
+    result = _apply(
+        {"light.kitchen": {"name": "Kitchen", "icon": "mdi:lamp", "hidden": False}}
+    )
+    assert result == (0, 0, 1)
+    assert registry.updates == []
+
+
+def test_only_changed_fields_are_passed(registry):
+    result = _apply(
+        {
+            "light.kitchen": {"name": "Kitchen", "icon": "mdi:bulb"},
+            "switch.fan": {"hidden": True, "disabled": False},
+            "sensor.gone": {"name": "Missing"},
+        }
+    )
+    assert result == (2, 1, 0)
+    assert registry.updates == [
+        ("light.kitchen", {"icon": "mdi:bulb"}),
+        ("switch.fan", {"hidden_by": er.RegistryEntryHider.USER}),
+    ]
+
+
+def test_missing_entity_raises_when_strict(registry):
+    with pytest.raises(ValueError):
+        _apply({"sensor.gone": {"name": "Missing"}}, strict_entities=True)
+
+
+def test_replace_mode_resets_unmentioned_fields(registry):
+    registry.entities["switch.fan"].hidden_by = er.RegistryEntryHider.USER
+
+    _apply(
+        {"light.kitchen": {"icon": "mdi:lamp"}, "switch.fan": {"name": "Fan"}},
+        merge=False,
+    )
+
+    assert set(_RESET_UPDATES) == {"name", "icon", "hidden_by", "disabled_by"}
+    assert registry.updates == [
+        ("light.kitchen", {"name": None}),
+        ("switch.fan", {"name": "Fan", "hidden_by": None}),
+    ]
+
+
+@pytest.mark.parametrize("area", ["living_room", "Living Room", "living room", "LivingRoom"])
+def test_area_resolves_by_id_or_normalized_name(registry, area):
+    _apply({"switch.fan": {"area": area}})
+    assert registry.updates == [("switch.fan", {"area_id": "living_room"})]
+
+
+def test_unknown_area_clears_the_assignment(registry):
+    registry.entities["switch.fan"].area_id = "living_room"
+    _apply({"switch.fan": {"area": "Garage"}})
+    assert registry.updates == [("switch.fan", {"area_id": None})]
+
+
+def test_area_lookup_uses_registry_normalized_names(registry):
+    assert _area_lookup(None) == ({"living_room"}, {"livingroom": "living_room"})
+
+
+def _fake_hass():
+    hass = SimpleNamespace(data={})
+    em._ensure_domain_bucket(hass)
+    return hass
+
+
+def _event(action, entity_id, **extra):
+    return SimpleNamespace(data={"action": action, "entity_id": entity_id, **extra})
+
+
+def test_override_index_follows_registry_events(registry):
+    hass = _fake_hass()
+    bucket = hass.data[DOMAIN]
+    bucket[DATA_REGISTRY_UNSUB] = lambda: None
+    bucket[DATA_REGISTRY_VERSION] = 0
+    listener = _registry_listener(hass)
+
+    # Events before the first export only bump the version
+    listener(_event("create", "switch.fan"))
+    assert bucket[DATA_OVERRIDE_INDEX] is None
+    assert bucket[DATA_REGISTRY_VERSION] == 1
+
+    assert _override_index(hass, registry) == {"light.kitchen"}
+
+    registry.entities["switch.fan"].icon = "mdi:fan"
+    listener(_event("update", "switch.fan", changes={"icon": None}))
+    assert bucket[DATA_OVERRIDE_INDEX] == {"light.kitchen", "switch.fan"}
+    assert bucket[DATA_REGISTRY_VERSION] == 1
+
+    entry = registry.entities.pop("light.kitchen")
+    entry.entity_id = "light.pantry"
+    registry.entities["light.pantry"] = entry
+    listener(_event("update", "light.pantry", old_entity_id="light.kitchen"))
+    assert bucket[DATA_OVERRIDE_INDEX] == {"light.pantry", "switch.fan"}
+    assert bucket[DATA_REGISTRY_VERSION] == 2
+
+    registry.entities["switch.fan"].icon = None
+    listener(_event("update", "switch.fan", changes={"icon": "mdi:fan"}))
+    listener(_event("remove", "light.pantry"))
+    assert bucket[DATA_OVERRIDE_INDEX] == set()
+    assert bucket[DATA_REGISTRY_VERSION] == 3
+
+
+def test_no_index_without_a_registry_listener(registry):
+    assert _override_index(_fake_hass(), registry) is None
+
+
+def test_identical_imports_coalesce_until_the_file_is_read(tmp_path, monkeypatch):
+    reads = []
+
+    async def _run():
+        release = asyncio.Event()
+
+        async def _slow_read():
+            reads.append(len(reads))
+            await release.wait()
+            return None, {}
+
+        async def _no_apply(*_args, **_kwargs):
+            return 0, 0, 0
+
+        monkeypatch.setattr(
+            em, "_read_entities", lambda _hass, _path: asyncio.ensure_future(_slow_read())
+        )
+        monkeypatch.setattr(em, "_area_lookup", lambda _hass: (set(), {}))
+        monkeypatch.setattr(em, "_apply_overrides", _no_apply)
+
+        hass = SimpleNamespace(
+            data={},
+            config=SimpleNamespace(path=lambda *parts: str(tmp_path.joinpath(*parts))),
+            async_create_task=asyncio.ensure_future,
+        )
+        em._ensure_domain_bucket(hass)
+        call = SimpleNamespace(hass=hass, data={"merge": True, "strict_entities": False})
+
+        def _import():
+            return asyncio.ensure_future(em._handle_import_service(call))
+
+        async def _settle():
+            for _ in range(10):
+                await asyncio.sleep(0)
+
+        # Both start before the first run takes the lock: one read
+        first = [_import(), _import()]
+        await _settle()
+        assert reads == [0]
+
+        # The file is being read now; later calls share one follow-up run
+        later = [_import(), _import(), _import()]
+        await _settle()
+        release.set()
+        await asyncio.gather(*first, *later)
+        assert reads == [0, 1]
+        assert hass.data[DOMAIN][DATA_IMPORT_TASKS] == {}
+
+    asyncio.run(_run())